@@ -0,0 +1,27 @@
+# fragrec: fragrance recommender core, importable without Streamlit.
+
+from fragrec.core import (
+    CATALOG,
+    WEIGHTS,
+    Archetype,
+    Climate,
+    Fragrance,
+    Occasion,
+    UserProfile,
+    explain_pick,
+    recommend,
+    score_many,
+)
+
+__all__ = [
+    "CATALOG",
+    "WEIGHTS",
+    "Archetype",
+    "Climate",
+    "Fragrance",
+    "Occasion",
+    "UserProfile",
+    "explain_pick",
+    "recommend",
+    "score_many",
+]
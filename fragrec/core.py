@@ -0,0 +1,339 @@
+# fragrec/core.py  (data model, demo catalog and recommender; no Streamlit dependency)
+# -------------------------------------------------------------
+
+import functools
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import List, Dict, Any, Iterable, Tuple
+import numpy as np
+
+# =============================
+# Data structures
+# =============================
+@dataclass(frozen=True, slots=True)
+class Fragrance:
+    id: str
+    brand: str
+    name: str
+    weight: float           # 0 = very light, 1 = very heavy
+    brightness: float       # 0 = very fresh/green, 1 = very sweet/resinous
+    sillage: int            # 1..5
+    longevity: int          # 1..5
+    seasonality: Tuple[str, ...]  # e.g., ("hot", "mild", "cool")
+    occasions: Tuple[str, ...]    # e.g., ("office", "date", "formal", "everyday")
+    archetypes: Tuple[str, ...]   # e.g., ("elegant", "bold", "mysterious", "approachable", "refined", "youthful", "adventurous", "sensual")
+    price: float
+    def full_name(self) -> str:
+        return f"{self.brand} {self.name}"
+
+@dataclass
+class UserProfile:
+    climate: str            # hot | mild | cool | mixed
+    occasion: str          # office | date | formal | gym | everyday
+    intensity: str         # skin | moderate | trail
+    longevity_goal: str    # short | workday | allday
+    weight_pref: float     # 0..1 target
+    brightness_pref: float # 0..1 target
+    aspiration: List[str]  # desired identity cues
+
+# Small-integer codes for the categorical labels; the values double as bit positions in the
+# packed catalog masks below.
+class Climate(IntEnum):
+    HOT = 0
+    MILD = 1
+    COOL = 2
+    MIXED = 3
+
+class Occasion(IntEnum):
+    OFFICE = 0
+    DATE = 1
+    FORMAL = 2
+    GYM = 3
+    EVERYDAY = 4
+
+class Archetype(IntEnum):
+    ELEGANT = 0
+    BOLD = 1
+    MYSTERIOUS = 2
+    APPROACHABLE = 3
+    REFINED = 4
+    YOUTHFUL = 5
+    ADVENTUROUS = 6
+    SENSUAL = 7
+
+# Label (as used in the quiz and CATALOG) -> enum member
+CLIMATES = {c.name.lower(): c for c in Climate}
+OCCASIONS = {o.name.lower(): o for o in Occasion}
+ARCHETYPES = {a.name.lower(): a for a in Archetype}
+
+# =============================
+# Helpers
+# =============================
+
+# Target sillage per intensity and target longevity per goal (1..5 scale, defaults 3.0 / 4.0)
+_INT_MAP = {"skin": 1.0, "moderate": 3.0, "trail": 5.0}
+_LON_MAP = {"short": 2.0, "workday": 4.0, "allday": 5.0}
+
+WEIGHTS = {"climate": 0.20, "occasion": 0.15, "intensity": 0.15, "longevity": 0.15, "latent": 0.20, "aspiration": 0.10, "diversity": 0.05}
+_WEIGHTS_ORDER = ("climate", "occasion", "intensity", "longevity", "latent", "aspiration", "diversity")
+_WEIGHTS_VEC = np.array([WEIGHTS[k] for k in _WEIGHTS_ORDER], dtype=np.float64)
+
+# =============================
+# Catalog (demo)
+# =============================
+# Immutable: the cached catalog arrays below are a snapshot of it.
+CATALOG: Tuple[Fragrance, ...] = (
+    Fragrance("1", "Chanel", "Bleu de Chanel", 0.45, 0.35, 3, 4, ("mild", "hot"), ("office", "everyday", "date"), ("refined", "approachable"), 110.0),
+    Fragrance("2", "Dior", "Sauvage EDT", 0.50, 0.40, 4, 4, ("hot", "mild"), ("everyday", "date"), ("bold", "youthful"), 100.0),
+    Fragrance("3", "Le Labo", "Santal 33", 0.70, 0.60, 4, 5, ("mild", "cool"), ("office", "date", "formal"), ("adventurous", "sensual"), 220.0),
+    Fragrance("4", "MFK", "Baccarat Rouge 540", 0.80, 0.85, 5, 5, ("cool", "mild"), ("formal", "date"), ("bold", "mysterious", "elegant"), 300.0),
+    Fragrance("5", "Chanel", "No.5 EDP", 0.65, 0.70, 3, 5, ("cool", "mild"), ("formal", "office"), ("elegant", "refined"), 200.0),
+    Fragrance("6", "Tom Ford", "Black Orchid", 0.85, 0.80, 5, 5, ("cool",), ("date", "formal"), ("mysterious", "bold", "sensual"), 180.0),
+    Fragrance("7", "Jo Malone", "Wood Sage & Sea Salt", 0.25, 0.15, 2, 3, ("hot", "mild"), ("office", "everyday"), ("approachable", "refined"), 120.0),
+    Fragrance("8", "Prada", "Infusion d'Iris", 0.35, 0.30, 2, 4, ("mild", "cool"), ("office", "formal"), ("elegant", "refined"), 150.0),
+    Fragrance("9", "Giorgio Armani", "Acqua di Giò Profondo", 0.40, 0.25, 3, 4, ("hot", "mild"), ("everyday", "office"), ("approachable", "youthful"), 120.0),
+)
+
+# =============================
+# Catalog arrays (structure-of-arrays view of CATALOG, built once)
+# =============================
+# Categorical fields are packed one bit per label (bit j <-> enum value j), so fits are
+# bitwise ANDs and overlaps are popcounts.
+def _pack(labels: Iterable[str], index: Dict[str, IntEnum]) -> int:
+    bits = 0
+    for label in labels:
+        if label in index:
+            bits |= 1 << index[label]
+    return bits
+
+def _unpack(bits: np.ndarray, width: int) -> np.ndarray:
+    return ((bits[:, None] >> np.arange(width)) & 1).astype(np.float64)
+
+# Column layout of _CatalogArrays.feat: user-independent catalog features such that every score
+# component except latent is linear in them, so score_many can score many users with one matmul.
+_LEVELS = np.arange(1, 6)                           # sillage / longevity scale
+_F_CONST = 0
+_F_SEASON = _F_CONST + 1                            # + Climate: suited to that season
+_F_MULTI = _F_SEASON + len(Climate)                 # suited to 2+ seasons
+_F_OCC = _F_MULTI + 1                               # + Occasion: lists that occasion
+_F_EVERYDAY_ONLY = _F_OCC + len(Occasion)           # + Occasion: lists "everyday" but not that occasion
+_F_ARCHE = _F_EVERYDAY_ONLY + len(Occasion)         # + Archetype
+_F_SIL = _F_ARCHE + len(Archetype)                  # + level - 1: sillage one-hot
+_F_LON = _F_SIL + len(_LEVELS)                      # + level - 1: longevity one-hot
+_F_DIM = _F_LON + len(_LEVELS)
+
+@dataclass
+class _CatalogArrays:
+    w: np.ndarray            # (N,) weight
+    b: np.ndarray            # (N,) brightness
+    sil: np.ndarray          # (N,) sillage
+    lon: np.ndarray          # (N,) longevity
+    season_bits: np.ndarray  # (N,) uint32, bits per Climate
+    occ_bits: np.ndarray     # (N,) uint32, bits per Occasion
+    arche_bits: np.ndarray   # (N,) uint32, bits per Archetype
+    multi_season: np.ndarray # (N,) bool, suited to 2+ seasons
+    everyday: np.ndarray     # (N,) bool, lists the "everyday" occasion
+    feat: np.ndarray         # (N, _F_DIM) float, see the _F_* layout
+
+def _build_catalog_arrays(catalog: Tuple[Fragrance, ...]) -> _CatalogArrays:
+    season_bits = np.array([_pack(f.seasonality, CLIMATES) for f in catalog], dtype=np.uint32)
+    occ_bits = np.array([_pack(f.occasions, OCCASIONS) for f in catalog], dtype=np.uint32)
+    arche_bits = np.array([_pack(f.archetypes, ARCHETYPES) for f in catalog], dtype=np.uint32)
+    sil = np.array([f.sillage for f in catalog], dtype=np.float64)
+    lon = np.array([f.longevity for f in catalog], dtype=np.float64)
+    multi_season = np.bitwise_count(season_bits) >= 2
+    everyday = (occ_bits & (1 << Occasion.EVERYDAY)) != 0
+
+    occ = _unpack(occ_bits, len(Occasion))
+    feat = np.zeros((len(catalog), _F_DIM))
+    feat[:, _F_CONST] = 1.0
+    feat[:, _F_SEASON:_F_MULTI] = _unpack(season_bits, len(Climate))
+    feat[:, _F_MULTI] = multi_season
+    feat[:, _F_OCC:_F_EVERYDAY_ONLY] = occ
+    feat[:, _F_EVERYDAY_ONLY:_F_ARCHE] = everyday[:, None] * (1.0 - occ)
+    feat[:, _F_ARCHE:_F_SIL] = _unpack(arche_bits, len(Archetype))
+    feat[:, _F_SIL:_F_LON] = sil[:, None] == _LEVELS
+    feat[:, _F_LON:_F_DIM] = lon[:, None] == _LEVELS
+
+    return _CatalogArrays(
+        w=np.array([f.weight for f in catalog], dtype=np.float64),
+        b=np.array([f.brightness for f in catalog], dtype=np.float64),
+        sil=sil,
+        lon=lon,
+        season_bits=season_bits,
+        occ_bits=occ_bits,
+        arche_bits=arche_bits,
+        multi_season=multi_season,
+        everyday=everyday,
+        feat=feat,
+    )
+
+# Built on first use and then shared by every scorer for the life of the process.
+@functools.lru_cache(maxsize=None)
+def _catalog_arrays() -> _CatalogArrays:
+    return _build_catalog_arrays(CATALOG)
+
+# =============================
+# Recommender core
+# =============================
+
+_PART_KEYS = _WEIGHTS_ORDER[:-1]  # all components but diversity, which depends on picks
+
+# out = clip(1 - |(values - target) / 4|, 0, 1), written in place.
+def _target_fit(values: np.ndarray, target: float, out: np.ndarray) -> None:
+    np.subtract(values, target, out=out)
+    np.divide(out, 4.0, out=out)
+    np.abs(out, out=out)
+    np.subtract(1.0, out, out=out)
+    np.clip(out, 0.0, 1.0, out=out)
+
+# Per-component scores for every catalog item at once (diversity depends on picks, see recommend).
+# Returns a (len(_PART_KEYS), N) matrix, one row per component in _PART_KEYS order; every row is
+# written in place, so scoring creates no intermediate arrays beyond that matrix.
+def _score_all(user: UserProfile) -> np.ndarray:
+    A = _catalog_arrays()
+    n = len(A.w)
+    parts_mat = np.empty((len(_PART_KEYS), n))
+    climate, occasion, intensity, longevity, latent, aspiration = parts_mat
+
+    clim = CLIMATES.get(user.climate)
+    if clim is Climate.MIXED:
+        climate.fill(0.7)
+        np.copyto(climate, 1.0, where=A.multi_season)
+    else:
+        climate.fill(0.3)
+        if clim is not None:
+            np.copyto(climate, 1.0, where=(A.season_bits & (1 << clim)) != 0)
+
+    occasion.fill(0.2)
+    np.copyto(occasion, 0.6, where=A.everyday)
+    occ = OCCASIONS.get(user.occasion)
+    if occ is not None:
+        np.copyto(occasion, 1.0, where=(A.occ_bits & (1 << occ)) != 0)
+
+    _target_fit(A.sil, _INT_MAP.get(user.intensity, 3.0), out=intensity)
+    _target_fit(A.lon, _LON_MAP.get(user.longevity_goal, 4.0), out=longevity)
+
+    # latent = 0.5 * (1 - |wp - w|) + 0.5 * (1 - |bp - b|); the aspiration row is free until
+    # the end, so it holds the brightness term meanwhile.
+    for pref, values, row in ((user.weight_pref, A.w, latent), (user.brightness_pref, A.b, aspiration)):
+        np.subtract(pref, values, out=row)
+        np.abs(row, out=row)
+        np.subtract(1.0, row, out=row)
+        np.multiply(0.5, row, out=row)
+    np.add(latent, aspiration, out=latent)
+
+    if user.aspiration:
+        overlap = np.bitwise_count(A.arche_bits & _pack(user.aspiration, ARCHETYPES))
+        np.divide(overlap, max(1, len(user.aspiration)), out=aspiration)
+        np.clip(aspiration, 0.0, 1.0, out=aspiration)
+    else:
+        aspiration.fill(0.5)
+
+    return parts_mat
+
+
+def recommend(user: UserProfile, k: int = 3) -> List[Dict[str, Any]]:
+    A = _catalog_arrays()
+    n = len(A.w)
+    k = min(k, n)
+    parts_mat = _score_all(user)
+    # Weighted column sums rather than a matmul: reducing over axis 0 adds the rows in _WEIGHTS_ORDER,
+    # whereas a BLAS dot reorders the sum, moves totals by an ulp and flips tie breaks between
+    # equally scored fragrances.
+    base = (_WEIGHTS_VEC[:-1, None] * parts_mat).sum(axis=0)
+
+    # The diversity bonus adds at most WEIGHTS["diversity"] * 0.05 to a score, so a greedy pick can only
+    # come from rows whose base score is within that margin of the k-th best. Score the catalog once,
+    # keep that pool (in catalog order, so ties still go to the earlier item) and run the picks on it.
+    if 0 < k < n:
+        kth = np.partition(base, n - k)[n - k]
+        pool = np.flatnonzero(base >= kth - WEIGHTS["diversity"] * 0.05 - 1e-9)
+    else:
+        pool = np.arange(n)
+    pool_base = base[pool]
+    pool_arche = A.arche_bits[pool]
+
+    picked_mask = np.zeros(len(pool), dtype=bool)
+    have = np.uint32(0)  # archetype bits covered by picks so far
+    diversity = np.full(len(pool), 0.05)
+    results = []
+    for _ in range(k):
+        total = pool_base + WEIGHTS["diversity"] * diversity
+        total[picked_mask] = -np.inf
+        j = int(np.argmax(total))
+        picked_mask[j] = True
+        i = int(pool[j])
+        best = CATALOG[i]
+        best_parts = dict(zip(_PART_KEYS, parts_mat[:, i].tolist()))
+        best_parts["diversity"] = float(diversity[j])
+        best_parts["total"] = float(total[j])
+        results.append({
+            "id": best.id,
+            "name": best.full_name(),
+            "score": round(best_parts["total"], 3),
+            "parts": {k: round(v, 3) for k, v in best_parts.items()},
+            "archetypes": list(best.archetypes),
+        })
+        have |= pool_arche[j]
+        diversity = np.where((pool_arche & ~have) != 0, 0.05, 0.0)
+    return results
+
+
+# Weighted coefficients over the _F_* catalog features that reproduce a user's climate, occasion,
+# intensity, longevity and aspiration scores (latent is not linear in the catalog and is added
+# separately in score_many).
+def _user_features(user: UserProfile) -> np.ndarray:
+    W = WEIGHTS
+    q = np.zeros(_F_DIM)
+
+    clim = CLIMATES.get(user.climate)
+    if clim is Climate.MIXED:
+        q[_F_CONST] += W["climate"] * 0.7
+        q[_F_MULTI] = W["climate"] * 0.3
+    else:
+        q[_F_CONST] += W["climate"] * 0.3
+        if clim is not None:
+            q[_F_SEASON + clim] = W["climate"] * 0.7
+
+    q[_F_CONST] += W["occasion"] * 0.2
+    occ = OCCASIONS.get(user.occasion)
+    if occ is not None:
+        q[_F_OCC + occ] = W["occasion"] * 0.8
+        q[_F_EVERYDAY_ONLY + occ] = W["occasion"] * 0.4
+    else:
+        q[_F_OCC + Occasion.EVERYDAY] = W["occasion"] * 0.4
+
+    for start, target, key in ((_F_SIL, _INT_MAP.get(user.intensity, 3.0), "intensity"),
+                               (_F_LON, _LON_MAP.get(user.longevity_goal, 4.0), "longevity")):
+        q[start:start + len(_LEVELS)] = W[key] * np.clip(1 - np.abs((_LEVELS - target) / 4.0), 0.0, 1.0)
+
+    if user.aspiration:
+        for a in {ARCHETYPES[a] for a in user.aspiration if a in ARCHETYPES}:
+            q[_F_ARCHE + a] = W["aspiration"] / max(1, len(user.aspiration))
+    else:
+        q[_F_CONST] += W["aspiration"] * 0.5
+    return q
+
+
+# Base scores (everything but the pick-dependent diversity bonus) for many users at once, as a
+# (U, N) array: one (U, D) x (D, N) matmul plus the broadcast latent term. Meant for A/B runs and
+# backfills; values agree with what recommend ranks on up to float rounding.
+def score_many(users: List[UserProfile]) -> np.ndarray:
+    A = _catalog_arrays()
+    q = np.array([_user_features(u) for u in users]).reshape(len(users), _F_DIM)
+    wp = np.array([u.weight_pref for u in users])[:, None]
+    bp = np.array([u.brightness_pref for u in users])[:, None]
+    latent = 0.5 * (1.0 - np.abs(wp - A.w)) + 0.5 * (1.0 - np.abs(bp - A.b))
+    return q @ A.feat.T + WEIGHTS["latent"] * latent
+
+
+def explain_pick(user: UserProfile, r: Dict[str, Any]) -> str:
+    mood = ("skin-close" if user.intensity == "skin" else
+            "moderately projecting" if user.intensity == "moderate" else
+            "leaves a trail")
+    asp = ", ".join(user.aspiration) if user.aspiration else "your style"
+    return (
+        f"Because you chose **{user.occasion}** in a **{user.climate}** climate and prefer **{mood}** with **{user.longevity_goal}** longevity, "
+        f"we prioritized weight/brightness close to your taste and scents mapped to **{asp}**."
+    )